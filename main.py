@@ -10,7 +10,14 @@ from src.helpers import (
     read_point_cloud,
     preprocess_point_cloud,
     save_pc_inside_mask,
+    split_point_cloud_name,
 )
+from src.stream import filter_point_cloud_stream
+from src.mask_index import MaskIndex
+from src.mask_cache import load_mask_index
+from src.raster_mask import RasterMask
+from src.parallel import ParallelIndex
+from src.coord_store import CoordStore, convert_to_store, filter_store
 
 
 def main(args: argparse.Namespace):
@@ -23,8 +30,34 @@ def main(args: argparse.Namespace):
     Returns:
     - None
     """
+    if args.chunk_size and (args.test or args.plot or args.Plot):
+        raise KeyError(
+            "call main.py with either '--chunk-size' or '-t'/'-p'/'-P', not both simultaneously"
+        )
+
+    if args.to_store:
+        base_name, extension = split_point_cloud_name(args.input)
+        point_cloud_path = "./data/input/point_cloud/" + base_name
+        convert_to_store(
+            point_cloud_path + extension,
+            point_cloud_path + ".store",
+            args.epsg,
+            chunk_size=args.chunk_size or 1_000_000,
+        )
+        return
+
     mask_path = f"./data/input/mask/{args.mask}.gpkg"
-    mask = read_mask(mask_path)
+    if args.cache:
+        mask, index = load_mask_index(mask_path, tile_size=args.tile_size)
+    else:
+        mask = read_mask(mask_path)
+        index = MaskIndex(mask, tile_size=args.tile_size) if args.index else None
+    if args.raster_cell:
+        index = RasterMask(mask, args.raster_cell, fallback=index)
+    if args.workers > 1:
+        index = ParallelIndex(mask, index, workers=args.workers)
+
+    extension = ".csv"
 
     if args.test and not args.input:
         args.input = "test_point_cloud"
@@ -37,30 +70,90 @@ def main(args: argparse.Namespace):
 
     elif args.input and not args.test:
         point_cloud_path = "./data/input/point_cloud/"
-        point_cloud = read_point_cloud(point_cloud_path + args.input + ".csv")
+        args.input, extension = split_point_cloud_name(args.input)
+        point_cloud_file = point_cloud_path + args.input + extension
+
+        if extension == ".store":
+            if args.plot or args.Plot:
+                raise KeyError(
+                    "call main.py with either '-i <input>.store' or '-p'/'-P', not both simultaneously"
+                )
+            filter_store(
+                mask,
+                CoordStore(point_cloud_file),
+                args.input,
+                extension=output_extension(args, ".csv"),
+                index=index,
+                chunk_size=args.chunk_size or 10_000_000,
+            )
+            if args.workers > 1:
+                index.close()
+            return
+
+        if args.chunk_size:
+            filter_point_cloud_stream(
+                mask,
+                point_cloud_file,
+                args.input,
+                args.epsg,
+                args.chunk_size,
+                index=index,
+                extension=output_extension(args, extension),
+            )
+            if args.workers > 1:
+                index.close()
+            return
+
+        point_cloud = read_point_cloud(point_cloud_file)
 
     elif args.input and args.test:
         raise KeyError(
             "call main.py with either '-t' or '-i <input_point_cloud>', not both simultaneously"
         )
 
-    point_cloud = preprocess_point_cloud(point_cloud, args.epsg)
+    if args.no_geometry and (args.plot or args.Plot):
+        raise KeyError(
+            "call main.py with either '--no-geometry' or '-p'/'-P', not both simultaneously"
+        )
 
-    pc_inside_mask, pc_outside_mask = split_point_cloud_by_mask(mask, point_cloud)
-    save_pc_inside_mask(pc_inside_mask, args.input)
+    point_cloud = preprocess_point_cloud(
+        point_cloud, args.epsg, geometry=not args.no_geometry
+    )
+
+    split = split_point_cloud_by_mask(mask, point_cloud, index=index)
+    if args.workers > 1:
+        index.close()
+    save_pc_inside_mask(
+        split, args.input, extension=output_extension(args, extension)
+    )
 
     data = {
         "Plot": args.Plot,
         "mask": mask,
         "pc": point_cloud,
-        "in": pc_inside_mask,
-        "out": pc_outside_mask,
+        "split": split,
     }
 
     if args.plot or args.Plot:
         plot_data(data)
 
 
+def output_extension(args: argparse.Namespace, input_extension: str) -> str:
+    """
+    Returns the file extension of the output point cloud.
+
+    Parameters:
+    - args (argparse.Namespace): Parsed command-line arguments.
+    - input_extension (str): The file extension of the input point cloud.
+
+    Returns:
+    - str: The extension of '--output-format' if given, otherwise the extension of the input.
+    """
+    if args.output_format:
+        return "." + args.output_format
+    return input_extension
+
+
 if __name__ == "__main__":
     args = gen_args()
     main(args)
@@ -13,9 +13,17 @@ def gen_args() -> argparse.Namespace:
     - The available arguments include 'mask', 'input', 'test', 'plot', 'Plot', and 'epsg'.
     - 'mask' is the name of the mask file (without the '.gpkg' file extension). To use a small example mask, use 'small_mask'.
     - 'input' is the input point cloud to be filtered. Requires 'x' and 'y' to be column names of coordinate data.
+    - 'output_format' is the file format of the output point cloud. Defaults to the format of the input.
     - 'test' activates test mode. This will generate and thereafter load and process a test point cloud.
     - 'plot' and 'Plot' activate data plotting (excluding and including the mask, respectively).
     - 'epsg' specifies the EPSG code (e.g., 3006 for SWEREF 99 TM (EPSG:3006)).
+    - 'no_geometry' skips building Point geometries and masks the raw 'x' and 'y' coordinates instead.
+    - 'chunk_size' streams the input point cloud through the mask in chunks of this many rows.
+    - 'index' classifies the points with a prepared, tiled index of the mask, with tiles of side 'tile_size'.
+    - 'cache' loads the reprojected mask and its index from an on-disk cache, building them on the first run.
+    - 'workers' classifies the points in a pool of this many worker processes.
+    - 'to_store' converts the input point cloud to a memory-mapped coordinate store, which is read by '-i <name>.store'.
+    - 'raster_cell' classifies the points with a rasterized mask of this cell size, with an exact test near the boundary.
     """
     parser = argparse.ArgumentParser(description="EPA")
     parser.add_argument(
@@ -26,7 +34,14 @@ def gen_args() -> argparse.Namespace:
     parser.add_argument(
         "-i",
         "--input",
-        help="Input point cloud to be filtered. Requires 'x' and 'y' to be column names of coordinate data.",
+        help="Input point cloud to be filtered. Requires 'x' and 'y' to be column names of coordinate data. A CSV file unless the name ends with '.parquet', '.arrow', '.las' or '.laz'.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-format",
+        choices=["csv", "parquet", "arrow", "las", "laz"],
+        help="File format of the output point cloud. Defaults to the format of the input point cloud.",
+        required=False,
     )
     parser.add_argument(
         "-t",
@@ -51,5 +66,49 @@ def gen_args() -> argparse.Namespace:
         help="EPSG digits (e.g. 3006 for SWEREF 99 TM (EPSG:3006)).",
         required=False,
     )
+    parser.add_argument(
+        "--no-geometry",
+        action="store_true",
+        help="Do not build Point geometries. The raw 'x' and 'y' coordinates are masked directly, which is faster and uses less memory. Cannot be combined with '-p' or '-P'.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="Stream the input point cloud in chunks of this many rows instead of loading it into memory at once. Points outside the mask are written to '<input>_outside.csv'. Cannot be combined with '-t', '-p' or '-P'.",
+        required=False,
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Classify points with a prepared index of the mask, split into small tiles. Much faster than the default spatial join for large or complex masks such as 'coastline'.",
+    )
+    parser.add_argument(
+        "--tile-size",
+        type=float,
+        help="Side length of the mask index tiles, in units of the mask CRS. Chosen from the mask complexity if not given.",
+        required=False,
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Load the reprojected mask and its index (see '--index') from the cache in './data/cache/mask/'. They are built and cached on the first run, and rebuilt whenever the mask file changes.",
+    )
+    parser.add_argument(
+        "--raster-cell",
+        type=float,
+        help="Classify points with the mask rasterized to cells of this size, in units of the mask CRS. Only points in cells crossed by the mask boundary are tested exactly (against the index if '--index' is given). The result is identical to the default spatial join.",
+        required=False,
+    )
+    parser.add_argument(
+        "--to-store",
+        action="store_true",
+        help="Convert the input point cloud to a memory-mapped coordinate store in './data/input/point_cloud/<input>.store/' and exit. Filter the store with '-i <input>.store', which is much faster for repeated runs on the same point cloud.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes used to classify the points. Defaults to 1 (no worker processes).",
+    )
     args = parser.parse_args()
     return args
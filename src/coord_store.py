@@ -0,0 +1,248 @@
+import json
+import os
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from src.data_process import resolve_crs, transform_xy, classify_points
+from src.point_cloud_io import PointCloudWriter, iter_point_cloud
+
+STORE_EXTENSION = ".store"
+STORE_VERSION = 1
+
+# Column type of text columns, stored as concatenated UTF-8 bytes plus the end offset of every row
+TEXT = "text"
+
+
+class CoordStore:
+    """
+    A point cloud stored as one memory-mapped binary file per column.
+
+    Opening a store only reads its small 'meta.json' file and maps the column files into memory; no
+    point data is read until it is accessed. Slices of 'x', 'y' and the other columns are views on
+    the mapped files, so masking runs on the store without copying the coordinates, and the OS page
+    cache is shared between all processes that open the same store.
+
+    Parameters:
+    - store_path (str): The directory of the store, as written by 'convert_to_store'.
+
+    Attributes:
+    - crs (str): The CRS of the coordinates.
+    - x (np.memmap): The float64 'x' coordinates.
+    - y (np.memmap): The float64 'y' coordinates.
+    - columns (dict): All columns by name, 'x' and 'y' included, as read-only memory maps. A text column
+                      is a tuple of its UTF-8 bytes and the end offset of every row.
+
+    Example:
+    >>> store = CoordStore('./data/input/point_cloud/test1.store')
+    >>> inside = index.contains(store.x, store.y)
+    >>> pc_inside_mask = store.take(np.flatnonzero(inside))
+    """
+
+    def __init__(self, store_path: str):
+        self.store_path = store_path
+        with open(os.path.join(store_path, "meta.json")) as file:
+            meta = json.load(file)
+
+        self.crs = meta["crs"]
+        self.num_rows = meta["num_rows"]
+        self.columns = {}
+        for name, dtype in meta["columns"].items():
+            path = os.path.join(store_path, name)
+            if dtype == TEXT:
+                ends = _open_column(path + ".offsets", "<i8", self.num_rows)
+                size = int(ends[-1]) if self.num_rows else 0
+                self.columns[name] = (_open_column(path + ".bin", "u1", size), ends)
+            else:
+                self.columns[name] = _open_column(path + ".bin", dtype, self.num_rows)
+        self.x = self.columns["x"]
+        self.y = self.columns["y"]
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def take(self, rows: np.ndarray, columns: list = None) -> pd.DataFrame:
+        """
+        Materializes selected rows of the store as a DataFrame.
+
+        Parameters:
+        - rows (np.ndarray): The positions of the rows to read.
+        - columns (list): The columns to read. Defaults to all columns.
+
+        Returns:
+        - pd.DataFrame: The selected rows, with the columns in their original order.
+        """
+        names = columns or list(self.columns)
+        rows = np.asarray(rows, dtype=np.intp)
+        data = {}
+        for name in names:
+            column = self.columns[name]
+            if isinstance(column, tuple):
+                data[name] = _take_text(column, rows)
+            else:
+                data[name] = column[rows]
+        return pd.DataFrame(data)
+
+
+def convert_to_store(
+    input_path: str,
+    store_path: str,
+    epsg_code: str = None,
+    chunk_size: int = 1_000_000,
+    columns: list = None,
+) -> CoordStore:
+    """
+    Converts a point cloud file to a memory-mapped coordinate store.
+
+    Parameters:
+    - input_path (str): The file path to the point cloud, in any format supported by 'iter_point_cloud'.
+    - store_path (str): The directory to write the store to. It is created if it does not exist.
+    - epsg_code (str): The EPSG code of the point cloud. If None, 'EPSG:3006' ('SWEREF 99 TM') is assumed.
+    - chunk_size (int): The number of rows read and written at a time.
+    - columns (list): The columns to store. Defaults to all columns. 'x' and 'y' are always stored.
+
+    Returns:
+    - CoordStore: The opened store.
+
+    Raises:
+    - NameError: If the 'x' and 'y' columns are not found in the point cloud.
+
+    Note:
+    - 'x' and 'y' are stored as float64, other numeric columns with their own dtype and all remaining
+      columns as text. Every column is a raw binary file, described by 'meta.json' together with the
+      CRS and the number of rows.
+    - The input is read chunk by chunk, so point clouds larger than memory can be converted.
+    """
+    crs = resolve_crs(epsg_code)
+    os.makedirs(store_path, exist_ok=True)
+
+    dtypes = {}
+    files = {}
+    text_size = {}
+    num_rows = 0
+    try:
+        for chunk in iter_point_cloud(input_path, chunk_size, columns=columns):
+            if not files:
+                if not "x" in chunk.columns and not "y" in chunk.columns:
+                    raise NameError("Coordinates have to be labeled 'x' and 'y'")
+                dtypes = {
+                    name: (
+                        "<f8"
+                        if name in ("x", "y")
+                        else chunk[name].dtype.str
+                        if pd.api.types.is_numeric_dtype(chunk[name])
+                        else TEXT
+                    )
+                    for name in chunk.columns
+                }
+                for name, dtype in dtypes.items():
+                    path = os.path.join(store_path, name)
+                    files[name] = open(path + ".bin", "wb")
+                    if dtype == TEXT:
+                        files[name + ".offsets"] = open(path + ".offsets", "wb")
+                        text_size[name] = 0
+
+            for name, dtype in dtypes.items():
+                if dtype == TEXT:
+                    text_size[name] = _write_text(
+                        chunk[name], files[name], files[name + ".offsets"], text_size[name]
+                    )
+                else:
+                    values = np.ascontiguousarray(chunk[name], dtype=dtype)
+                    files[name].write(values.tobytes())
+            num_rows += len(chunk)
+    finally:
+        for file in files.values():
+            file.close()
+
+    meta = {
+        "version": STORE_VERSION,
+        "crs": crs,
+        "num_rows": num_rows,
+        "columns": dtypes,
+    }
+    with open(os.path.join(store_path, "meta.json"), "w") as file:
+        json.dump(meta, file, indent=2)
+
+    print(f"Saved coordinate store to '{store_path}' ({num_rows} points).")
+    return CoordStore(store_path)
+
+
+def filter_store(
+    mask: gpd.GeoDataFrame,
+    store: CoordStore,
+    filename: str,
+    extension: str = ".csv",
+    index=None,
+    chunk_size: int = 10_000_000,
+) -> dict:
+    """
+    Splits a coordinate store by a mask and writes the points inside the mask to a file.
+
+    Parameters:
+    - mask (gpd.GeoDataFrame): The GeoDataFrame representing the mask.
+    - store (CoordStore): The coordinate store.
+    - filename (str): The base name for the output file.
+    - extension (str): The file extension, and so the format, of the output file. Defaults to '.csv'.
+    - index (MaskIndex or RasterMask): An optional prepared index of the mask, used to classify the points.
+    - chunk_size (int): The number of points classified at a time.
+
+    Returns:
+    - dict: The number of points in each stage, as returned by 'classify_points'.
+
+    Note:
+    - The coordinates are classified directly on the memory-mapped files. Only the rows inside the mask
+      are read from the other columns and written to "./data/output/<filename>_filtered<extension>".
+    """
+    filepath = "./data/output/" + filename + "_filtered" + extension
+    counts = {}
+
+    with PointCloudWriter(filepath) as writer:
+        for start in range(0, max(len(store), 1), chunk_size):
+            stop = min(start + chunk_size, len(store))
+            x, y = transform_xy(
+                store.x[start:stop], store.y[start:stop], store.crs, mask.crs
+            )
+            inside = classify_points(mask, x, y, index=index, stats=counts)
+            writer.write(store.take(start + np.flatnonzero(inside)))
+
+    print("=" * 30)
+    print("Summary")
+    print("-" * 30)
+    print("Number of points:")
+    print(f"Input point cloud: {counts.get('input', 0)}")
+    print(f"Point cloud inside mask: {counts.get('inside', 0)}")
+    print(f"Point cloud outside mask: {counts.get('input', 0) - counts.get('inside', 0)}")
+    print("=" * 30)
+    print(f"Saved filtered point cloud to '{filepath}'.")
+
+    return counts
+
+
+def _open_column(path: str, dtype: str, num_rows: int) -> np.ndarray:
+    if num_rows == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(num_rows,))
+
+
+def _write_text(values: pd.Series, file, offsets_file, size: int) -> int:
+    """
+    Appends a text column chunk as UTF-8 bytes, and the end offset of every row. Returns the new size.
+    """
+    encoded = [value.encode() for value in values.fillna("").astype(str)]
+    ends = size + np.cumsum([len(value) for value in encoded], dtype="<i8")
+    file.write(b"".join(encoded))
+    offsets_file.write(ends.tobytes())
+    return int(ends[-1]) if len(ends) else size
+
+
+def _take_text(column: tuple, rows: np.ndarray) -> np.ndarray:
+    """
+    Decodes selected rows of a text column.
+    """
+    data, ends = column
+    stops = ends[rows]
+    starts = np.where(rows > 0, ends[np.maximum(rows - 1, 0)], 0)
+    return np.array(
+        [bytes(data[start:stop]).decode() for start, stop in zip(starts, stops)],
+        dtype=object,
+    )
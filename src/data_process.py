@@ -1,8 +1,13 @@
 import geopandas as gpd
-from shapely.geometry import Point
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import Transformer
 
 
-def preprocess(df: gpd.GeoDataFrame, epsg_code: str) -> gpd.GeoDataFrame:
+def preprocess(
+    df: gpd.GeoDataFrame, epsg_code: str, geometry: bool = True
+) -> gpd.GeoDataFrame:
     """
     Preprocesses a GeoDataFrame representing point cloud data by creating a GeoDataFrame with Point geometries.
 
@@ -10,15 +15,19 @@ def preprocess(df: gpd.GeoDataFrame, epsg_code: str) -> gpd.GeoDataFrame:
     - df (gpd.GeoDataFrame): The input GeoDataFrame containing point cloud data.
     - epsg_code (str): The EPSG code representing the Coordinate Reference System (CRS) for the point cloud data.
                       If None, the default EPSG code 'EPSG:3006' ('SWEREF 99 TM') is assumed.
+    - geometry (bool): If False, no Point geometries are built. The 'x' and 'y' columns are kept as float64
+                       arrays and the CRS is stored in 'df.attrs["crs"]'. Defaults to True.
 
     Returns:
-    - gpd.GeoDataFrame: A new GeoDataFrame containing Point geometries based on the 'x' and 'y' coordinates in the input.
+    - gpd.GeoDataFrame: A new GeoDataFrame containing Point geometries based on the 'x' and 'y' coordinates in the input,
+      or a pd.DataFrame with float64 'x' and 'y' columns if 'geometry' is False.
 
     Raises:
     - NameError: If the 'x' and 'y' columns are not found in the input GeoDataFrame.
 
     Note:
-    - The function creates Point geometries from 'x' and 'y' coordinates in the input GeoDataFrame.
+    - The function creates Point geometries from 'x' and 'y' coordinates in the input GeoDataFrame in a single
+      vectorized call ('gpd.points_from_xy'), without iterating over the rows.
     - If 'epsg_code' is None, the default CRS 'EPSG:3006' ('SWEREF 99 TM') is assumed.
     - The resulting GeoDataFrame has the specified or default CRS.
 
@@ -29,44 +38,370 @@ def preprocess(df: gpd.GeoDataFrame, epsg_code: str) -> gpd.GeoDataFrame:
     if not "x" in df.columns and not "y" in df.columns:
         raise NameError("Coordinates have to be labeled 'x' and 'y'")
 
-    points_geom = [Point(row.x, row.y) for _, row in df.iterrows()]
+    crs = resolve_crs(epsg_code)
 
+    x = df["x"].to_numpy(dtype="float64")
+    y = df["y"].to_numpy(dtype="float64")
+
+    if not geometry:
+        df = df.assign(x=x, y=y)
+        df.attrs["crs"] = crs
+        return df
+
+    points_geom = gpd.points_from_xy(x, y, crs=crs)
+    gdf = gpd.GeoDataFrame(df, geometry=points_geom, crs=crs)
+
+    return gdf
+
+
+def resolve_crs(epsg_code: str) -> str:
+    """
+    Resolves the CRS of an input point cloud from an EPSG code.
+
+    Parameters:
+    - epsg_code (str): The EPSG code of the point cloud. If None, 'EPSG:3006' ('SWEREF 99 TM') is assumed.
+
+    Returns:
+    - str: The CRS as an 'EPSG:<code>' string.
+    """
     if epsg_code is None:
         print("=" * 30)
         print(
             "No EPSG code provided. Assuming data are in 'EPSG:3006' ('SWEREF 99 TM')"
         )
-        gdf = gpd.GeoDataFrame(df, geometry=points_geom, crs="EPSG:3006")
+        return "EPSG:3006"
 
+    print("=" * 30)
+    print(f"Input point cloud in 'EPSG:{epsg_code}'")
+    return f"EPSG:{epsg_code}"
+
+
+def point_cloud_xy(point_cloud: pd.DataFrame, target_crs: str) -> (np.ndarray, np.ndarray):
+    """
+    Extracts the coordinates of a point cloud as float64 arrays in a target CRS.
+
+    Parameters:
+    - point_cloud (pd.DataFrame): A GeoDataFrame with Point geometries, or a DataFrame with 'x' and 'y'
+                                  columns and its CRS in 'attrs["crs"]' (see 'preprocess' with 'geometry=False').
+    - target_crs (str): The CRS the coordinates are returned in.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray]: The 'x' and 'y' coordinates.
+
+    Raises:
+    - ValueError: If the point cloud does not have a defined CRS.
+    """
+    if isinstance(point_cloud, gpd.GeoDataFrame):
+        source_crs = point_cloud.crs
+        coords = shapely.get_coordinates(point_cloud.geometry.values)
+        x, y = coords[:, 0], coords[:, 1]
     else:
-        print("=" * 30)
-        print(f"Input point cloud in 'EPSG:{epsg_code}'")
-        gdf = gpd.GeoDataFrame(df, geometry=points_geom, crs=f"EPSG:{epsg_code}")
+        source_crs = point_cloud.attrs.get("crs")
+        x = point_cloud["x"].to_numpy(dtype="float64")
+        y = point_cloud["y"].to_numpy(dtype="float64")
 
-    return gdf
+    if source_crs is None:
+        raise ValueError("Point cloud is missing a CRS.")
+
+    return transform_xy(x, y, source_crs, target_crs)
+
+
+def transform_xy(
+    x: np.ndarray, y: np.ndarray, source_crs: str, target_crs: str
+) -> (np.ndarray, np.ndarray):
+    """
+    Transforms raw coordinate arrays from one CRS to another.
+
+    Parameters:
+    - x (np.ndarray): The 'x' coordinates.
+    - y (np.ndarray): The 'y' coordinates.
+    - source_crs (str): The CRS of the input coordinates.
+    - target_crs (str): The CRS to transform the coordinates to.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray]: The transformed coordinates. The input arrays are returned as-is
+      if both CRS are equal.
+    """
+    transformer = Transformer.from_crs(source_crs, target_crs, always_xy=True)
+    if transformer.source_crs == transformer.target_crs:
+        return x, y
+    return transformer.transform(x, y)
+
+
+def points_within_mask(
+    mask: gpd.GeoDataFrame, x: np.ndarray, y: np.ndarray, index=None
+) -> np.ndarray:
+    """
+    Tests which coordinates lie within any polygon of a mask.
+
+    Parameters:
+    - mask (gpd.GeoDataFrame): The mask polygons.
+    - x (np.ndarray): The 'x' coordinates, in the CRS of the mask.
+    - y (np.ndarray): The 'y' coordinates, in the CRS of the mask.
+    - index (MaskIndex or RasterMask): An optional prepared index of the mask. If given, the points are tested against it.
+
+    Returns:
+    - np.ndarray: A boolean array, True for every point within the mask.
+
+    Note:
+    - 'shapely.contains_xy' gives the same answer as the 'within' predicate used by 'gpd.sjoin'
+      (points on the boundary are outside), but works on raw coordinates without building Point objects.
+    """
+    if index is not None:
+        return index.contains(x, y)
+
+    inside = np.zeros(len(x), dtype=bool)
+    for polygon in mask.geometry.values:
+        if polygon is None:
+            continue
+        shapely.prepare(polygon)
+        inside |= shapely.contains_xy(polygon, x, y)
+    return inside
+
+
+def morton_codes(
+    x: np.ndarray, y: np.ndarray, bounds: tuple = None, bits: int = 16
+) -> np.ndarray:
+    """
+    Computes Morton (Z-order) codes of coordinates, so that sorting by code groups nearby points together.
+
+    Parameters:
+    - x (np.ndarray): The 'x' coordinates.
+    - y (np.ndarray): The 'y' coordinates.
+    - bounds (tuple): The (xmin, ymin, xmax, ymax) extent mapped onto the code grid. Defaults to the
+                      extent of the coordinates.
+    - bits (int): The number of bits per axis, at most 32. The grid has 2**bits cells along each axis.
+
+    Returns:
+    - np.ndarray: The uint64 Morton code of every point.
+    """
+    if len(x) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    if bounds is None:
+        bounds = (np.nanmin(x), np.nanmin(y), np.nanmax(x), np.nanmax(y))
+    xmin, ymin, xmax, ymax = bounds
+
+    cells = 2**bits - 1
+    with np.errstate(invalid="ignore"):
+        ix = (x - xmin) * (cells / max(xmax - xmin, 1e-12))
+        iy = (y - ymin) * (cells / max(ymax - ymin, 1e-12))
+    ix = np.clip(np.nan_to_num(ix), 0, cells).astype(np.uint64)
+    iy = np.clip(np.nan_to_num(iy), 0, cells).astype(np.uint64)
+
+    return _spread_bits(ix) | (_spread_bits(iy) << np.uint64(1))
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """
+    Inserts a zero bit between each of the lower 32 bits of uint64 values.
+    """
+    values = values & np.uint64(0x00000000FFFFFFFF)
+    for shift, magic in (
+        (16, 0x0000FFFF0000FFFF),
+        (8, 0x00FF00FF00FF00FF),
+        (4, 0x0F0F0F0F0F0F0F0F),
+        (2, 0x3333333333333333),
+        (1, 0x5555555555555555),
+    ):
+        values = (values | (values << np.uint64(shift))) & np.uint64(magic)
+    return values
+
+
+def prefilter_points(
+    mask: gpd.GeoDataFrame, x: np.ndarray, y: np.ndarray
+) -> (np.ndarray, gpd.GeoDataFrame):
+    """
+    Rejects points that cannot be within a mask using bounding boxes only.
+
+    Parameters:
+    - mask (gpd.GeoDataFrame): The mask polygons.
+    - x (np.ndarray): The 'x' coordinates, in the CRS of the mask.
+    - y (np.ndarray): The 'y' coordinates, in the CRS of the mask.
+
+    Returns:
+    - Tuple[np.ndarray, gpd.GeoDataFrame]: A boolean array, True for every point that has to be tested
+      exactly, and the mask clipped to the extent of the points.
+
+    Note:
+    - The mask is exploded into single polygons and clipped to the bounding box of the points, grown by
+      a margin so that no point lies on the clipping rectangle. Points outside the envelopes of all
+      clipped polygons are then rejected with plain array comparisons.
+    - Clipping creates new vertices on the clipping rectangle whose coordinates are rounded to float64,
+      so points within a few ulp of a mask edge may be classified differently than against the full mask.
+    """
+    candidates = np.zeros(len(x), dtype=bool)
+    clipped = mask.iloc[:0][[mask.geometry.name]]
+    if len(x) == 0 or not np.isfinite(x).any():
+        return candidates, clipped
+
+    xmin, xmax = np.nanmin(x), np.nanmax(x)
+    ymin, ymax = np.nanmin(y), np.nanmax(y)
+    margin = 0.01 * max(xmax - xmin, ymax - ymin) + 1e-6
+
+    polygons = shapely.get_parts(mask.geometry.values)
+    polygons = shapely.clip_by_rect(
+        polygons, xmin - margin, ymin - margin, xmax + margin, ymax + margin
+    )
+    polygons = shapely.get_parts(polygons)
+    polygons = polygons[
+        (shapely.get_type_id(polygons) == 3) & ~shapely.is_empty(polygons)
+    ]
+
+    for pxmin, pymin, pxmax, pymax in shapely.bounds(polygons):
+        candidates |= (x >= pxmin) & (x <= pxmax) & (y >= pymin) & (y <= pymax)
+
+    clipped = gpd.GeoDataFrame(geometry=polygons, crs=mask.crs)
+    return candidates, clipped
+
+
+def classify_points(
+    mask: gpd.GeoDataFrame, x: np.ndarray, y: np.ndarray, index=None, stats: dict = None
+) -> np.ndarray:
+    """
+    Tests which coordinates lie within a mask, rejecting points by bounding box before any exact test.
+
+    Parameters:
+    - mask (gpd.GeoDataFrame): The mask polygons.
+    - x (np.ndarray): The 'x' coordinates, in the CRS of the mask.
+    - y (np.ndarray): The 'y' coordinates, in the CRS of the mask.
+    - index (MaskIndex or RasterMask): An optional prepared index of the mask, used for the exact test.
+    - stats (dict): An optional dictionary in which the per-stage counts are accumulated (see 'update_stats').
+
+    Returns:
+    - np.ndarray: A boolean array, True for every point within the mask.
+    """
+    candidates, clipped = prefilter_points(mask, x, y)
+    tested = np.flatnonzero(candidates)
+
+    inside = np.zeros(len(x), dtype=bool)
+    if len(tested):
+        if index is not None:
+            inside[tested] = index.contains(x[tested], y[tested])
+        else:
+            inside[tested] = points_within_mask(clipped, x[tested], y[tested])
+
+    update_stats(stats, len(x), len(tested), int(inside.sum()))
+    return inside
+
+
+def update_stats(stats: dict, num_input: int, num_tested: int, num_inside: int) -> None:
+    """
+    Accumulates the per-stage counts of a mask classification.
+
+    Parameters:
+    - stats (dict): The dictionary to update, holding 'input', 'rejected_bbox', 'tested' and 'inside'.
+                    Nothing is done if it is None.
+    - num_input (int): The number of points classified.
+    - num_tested (int): The number of points that passed the bounding box prefilter and were tested exactly.
+    - num_inside (int): The number of points within the mask.
+    """
+    if stats is None:
+        return
+    for key, value in (
+        ("input", num_input),
+        ("rejected_bbox", num_input - num_tested),
+        ("tested", num_tested),
+        ("inside", num_inside),
+    ):
+        stats[key] = stats.get(key, 0) + value
+
+
+class MaskSplit:
+    """
+    The result of splitting a point cloud by a mask: the point cloud and one membership flag per point.
+
+    Only the membership vector is stored. The points inside and outside the mask are selected from the
+    point cloud by position when 'inside' or 'outside' is accessed, so the split itself never copies the
+    point cloud, and writers can select the rows while writing (see 'PointCloudWriter.write').
+
+    Parameters:
+    - point_cloud (pd.DataFrame): The point cloud that was split, in the CRS of the mask.
+    - inside (np.ndarray): A boolean array, True for every point within the mask.
+    - packed (bool): If True, the membership is stored as packed bits, one bit per point. Defaults to False.
+
+    Attributes:
+    - point_cloud (pd.DataFrame): The point cloud that was split.
+    - num_inside (int): The number of points within the mask.
+    - num_outside (int): The number of points outside the mask.
+
+    Note:
+    - Unpacking the split gives the points inside and outside the mask, as earlier versions of
+      'split_point_cloud_by_mask' returned: 'pc_inside, pc_outside = split'.
+    - Points are selected by position, so point clouds with duplicate index labels are split correctly.
+
+    Example:
+    >>> split = split_point_cloud_by_mask(mask, point_cloud)
+    >>> write_point_cloud(split.point_cloud, './data/output/pc_filtered.csv', rows=split.membership)
+    >>> pc_outside = split.outside
+    """
+
+    def __init__(self, point_cloud: pd.DataFrame, inside: np.ndarray, packed: bool = False):
+        inside = np.asarray(inside, dtype=bool)
+        self.point_cloud = point_cloud
+        self.packed = packed
+        self.num_inside = int(inside.sum())
+        self.num_outside = len(inside) - self.num_inside
+        self._membership = np.packbits(inside) if packed else inside
+
+    @property
+    def membership(self) -> np.ndarray:
+        """
+        np.ndarray: A boolean array, True for every point within the mask.
+        """
+        if self.packed:
+            return np.unpackbits(self._membership, count=len(self.point_cloud)).astype(bool)
+        return self._membership
+
+    @property
+    def inside(self) -> pd.DataFrame:
+        """
+        pd.DataFrame: The points within the mask.
+        """
+        return self.point_cloud[self.membership]
+
+    @property
+    def outside(self) -> pd.DataFrame:
+        """
+        pd.DataFrame: The points outside the mask.
+        """
+        return self.point_cloud[~self.membership]
+
+    def __iter__(self):
+        yield self.inside
+        yield self.outside
+
+    def __getitem__(self, item: int) -> pd.DataFrame:
+        return (self.inside, self.outside)[item]
 
 
 def split_point_cloud_by_mask(
-    mask: gpd.GeoDataFrame, point_cloud: gpd.GeoDataFrame
-) -> (gpd.GeoDataFrame, gpd.GeoDataFrame):
+    mask: gpd.GeoDataFrame, point_cloud: gpd.GeoDataFrame, index=None, stats: dict = None
+) -> MaskSplit:
     """
-    Splits a GeoDataFrame representing a point cloud into two GeoDataFrames based on a mask.
+    Splits a GeoDataFrame representing a point cloud into the points inside and outside a mask.
 
     Parameters:
     - mask (gpd.GeoDataFrame): The GeoDataFrame representing the mask used for splitting the point cloud.
-    - point_cloud (gpd.GeoDataFrame): The GeoDataFrame representing the input point cloud.
+    - point_cloud (gpd.GeoDataFrame): The GeoDataFrame representing the input point cloud. A DataFrame
+      without geometries (see 'preprocess' with 'geometry=False') is classified from its raw 'x' and 'y' columns.
+    - index (MaskIndex or RasterMask): An optional prepared index of the mask. If given, points are classified with the index
+      instead of a spatial join. The same index can be reused for any number of point clouds.
+    - stats (dict): An optional dictionary in which the number of points in each stage is accumulated:
+      'input', 'rejected_bbox' (rejected by the bounding box prefilter), 'tested' (tested exactly) and 'inside'.
 
     Returns:
-    - Tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]: A tuple containing two GeoDataFrames -
+    - MaskSplit: The point cloud and the membership of every point. Unpacking it gives two GeoDataFrames -
       the first one representing the point cloud inside the mask, and the second one representing
       the point cloud outside the mask.
 
     Note:
     - The function uses the 'transform_crs' function to ensure both the mask and point cloud have the same CRS.
-    - The point cloud is split into two parts: 'pc_inside_mask' contains points inside the mask, and
-      'pc_outside_mask' contains points outside the mask.
+    - Before any exact test, points outside the envelopes of the mask polygons are rejected by
+      'prefilter_points', and the mask is clipped to the extent of the point cloud.
+    - A point is inside the mask if it is within any of the mask polygons, and appears only once in
+      the result even if mask polygons overlap.
     - The function provides a summary of the shapes of the input point cloud, point cloud inside the mask,
-      and point cloud outside the mask.
+      and point cloud outside the mask, and of the number of points in each stage.
 
     Example:
     >>> mask = gpd.read_file('path/to/mask.shp')
@@ -74,29 +409,61 @@ def split_point_cloud_by_mask(
     >>> pc_inside, pc_outside = split_point_cloud_by_mask(mask, point_cloud)
     """
 
-    def _summary():
+    def _summary(split):
+        num_columns = point_cloud.shape[1]
         print("=" * 30)
         print("Summary")
         print("-" * 30)
         print("Shape of point clouds:")
         print(f"Input point cloud: {point_cloud.shape}")
-        print(f"Point cloud inside mask: {pc_inside_mask.shape}")
-        print(f"Point cloud outside mask: {pc_outside_mask.shape}")
+        print(f"Point cloud inside mask: {(split.num_inside, num_columns)}")
+        print(f"Point cloud outside mask: {(split.num_outside, num_columns)}")
+        print("-" * 30)
+        print("Number of points per stage:")
+        print(f"Rejected by bounding box: {run_stats['rejected_bbox']}")
+        print(f"Tested exactly: {run_stats['tested']}")
+        print(f"Inside mask: {run_stats['inside']}")
         print("=" * 30)
+        update_stats(
+            stats, run_stats["input"], run_stats["tested"], run_stats["inside"]
+        )
+        return split
+
+    run_stats = {}
+
+    # Point clouds without geometries are classified from their raw coordinates
+    if not isinstance(point_cloud, gpd.GeoDataFrame):
+        x, y = point_cloud_xy(point_cloud, mask.crs)
+        inside = classify_points(mask, x, y, index=index, stats=run_stats)
+        return _summary(MaskSplit(point_cloud, inside))
 
     # Ensure both mask and point cloud have the same CRS
     target_crs = mask.crs
     point_cloud = transform_crs(point_cloud, target_crs)
 
-    # Spatial join to separate points inside and outside the mask
-    pc_inside_mask = gpd.sjoin(point_cloud, mask, predicate="within")
-    pc_inside_mask = pc_inside_mask[list(point_cloud.columns)]
-    pc_outside_mask = point_cloud[~point_cloud.index.isin(pc_inside_mask.index)]
+    coords = shapely.get_coordinates(point_cloud.geometry.values)
 
-    # Display summary information
-    _summary()
+    if index is not None:
+        inside = classify_points(
+            mask, coords[:, 0], coords[:, 1], index=index, stats=run_stats
+        )
+        return _summary(MaskSplit(point_cloud, inside))
+
+    # Reject points by bounding box, and query the remaining points against the clipped mask
+    candidates, clipped_mask = prefilter_points(mask, coords[:, 0], coords[:, 1])
+    tested = np.flatnonzero(candidates)
 
-    return pc_inside_mask, pc_outside_mask
+    # Spatial join to separate points inside and outside the mask, by position in the point cloud
+    inside = np.zeros(len(point_cloud), dtype=bool)
+    if len(tested):
+        matches, _ = clipped_mask.sindex.query(
+            point_cloud.geometry.values[tested], predicate="within"
+        )
+        inside[tested[matches]] = True
+    update_stats(run_stats, len(point_cloud), len(tested), int(inside.sum()))
+
+    # Display summary information
+    return _summary(MaskSplit(point_cloud, inside))
 
 
 def transform_crs(gdf: gpd.GeoDataFrame, target_crs: str) -> gpd.GeoDataFrame:
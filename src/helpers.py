@@ -1,7 +1,9 @@
+import os
 import geopandas as gpd
 import pandas as pd
-from src.data_process import transform_crs, preprocess
+from src.data_process import transform_crs, preprocess, MaskSplit
 from src.point_cloud import gen_point_cloud
+from src import point_cloud_io
 
 
 def read_mask(mask_path, target_crs="EPSG:3006"):
@@ -38,40 +40,62 @@ def generate_test_point_cloud(mask, settings):
     return test_point_cloud
 
 
-def read_point_cloud(file_path):
+def read_point_cloud(file_path, columns=None):
     """
-    Reads a point cloud from a CSV file.
+    Reads a point cloud from a CSV, Parquet, Arrow or LAS/LAZ file, selected by file extension.
 
     Parameters:
-    - file_path (str): The file path to the CSV file containing the point cloud.
+    - file_path (str): The file path to the file containing the point cloud.
+    - columns (list): The columns to read. Defaults to all columns.
 
     Returns:
     - pd.DataFrame: The point cloud DataFrame.
     """
-    return pd.read_csv(file_path)
+    return point_cloud_io.read_point_cloud(file_path, columns=columns)
 
 
-def preprocess_point_cloud(point_cloud, epsg_code):
+def split_point_cloud_name(name):
+    """
+    Splits the name of an input point cloud into its base name and file extension.
+
+    Parameters:
+    - name (str): The name of the point cloud, with or without a file extension.
+
+    Returns:
+    - Tuple[str, str]: The base name and the file extension. Names without a supported extension are CSV files.
+                         Coordinate stores (see 'convert_to_store') have the extension '.store'.
+    """
+    base_name, extension = os.path.splitext(name)
+    if extension.lower() in point_cloud_io.EXTENSIONS + (".store",):
+        return base_name, extension
+    return name, ".csv"
+
+
+def preprocess_point_cloud(point_cloud, epsg_code, geometry=True):
     """
     Preprocesses the point cloud by creating a GeoDataFrame with Point geometries.
 
     Parameters:
     - point_cloud (pd.DataFrame): The point cloud DataFrame.
     - epsg_code (str): The EPSG code representing the Coordinate Reference System (CRS) for the point cloud data.
+    - geometry (bool): If False, only the raw 'x' and 'y' coordinates are kept. Defaults to True.
 
     Returns:
     - gpd.GeoDataFrame: The preprocessed GeoDataFrame containing Point geometries.
     """
-    return preprocess(point_cloud, epsg_code)
+    return preprocess(point_cloud, epsg_code, geometry=geometry)
 
 
-def save_pc_inside_mask(df: gpd.GeoDataFrame, filename: str) -> None:
+def save_pc_inside_mask(df: gpd.GeoDataFrame, filename: str, extension: str = ".csv") -> None:
     """
     Saves a GeoDataFrame representing a point cloud, filtered by a mask, to a CSV file.
 
     Parameters:
-    - gdf (gpd.GeoDataFrame): The input GeoDataFrame containing the point cloud data.
+    - gdf (gpd.GeoDataFrame or MaskSplit): The input GeoDataFrame containing the point cloud data, or the result of
+      'split_point_cloud_by_mask', whose points inside the mask are then written without copying them first.
     - filename (str): The base name for the output CSV file. The file will be saved in the "./output/filtered/" directory.
+    - extension (str): The file extension, and so the format, of the output file: '.csv', '.parquet', '.arrow',
+      '.las' or '.laz'. Defaults to '.csv'.
 
     Returns:
     - None
@@ -82,8 +106,9 @@ def save_pc_inside_mask(df: gpd.GeoDataFrame, filename: str) -> None:
     - The CSV file is saved in the "./output/filtered/" directory with the specified filename followed by "_filtered.csv".
     - The function prints a message indicating the successful save operation.
     """
-    if "geometry" in df.columns:
-        df = df.drop(columns="geometry")
-    filepath = "./data/output/" + filename + "_filtered.csv"
-    df.to_csv(filepath, index=False)
+    filepath = "./data/output/" + filename + "_filtered" + extension
+    if isinstance(df, MaskSplit):
+        point_cloud_io.write_point_cloud(df.point_cloud, filepath, rows=df.membership)
+    else:
+        point_cloud_io.write_point_cloud(df, filepath)
     print(f"Saved filtered point cloud to '{filepath}'.")
@@ -0,0 +1,182 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import geopandas as gpd
+import numpy as np
+import shapely
+from src.helpers import read_mask
+from src.mask_index import MaskIndex
+
+CACHE_DIR = "./data/cache/mask"
+CACHE_MAX_BYTES = 1024**3
+
+# Bump when the layout of the cached arrays or the MaskIndex changes
+CACHE_VERSION = 1
+
+
+def load_mask_index(
+    mask_path: str,
+    target_crs: str = "EPSG:3006",
+    tile_size: float = None,
+    cache_dir: str = CACHE_DIR,
+    max_bytes: int = CACHE_MAX_BYTES,
+) -> (gpd.GeoDataFrame, MaskIndex):
+    """
+    Loads a reprojected mask and its MaskIndex from the on-disk cache, building and caching them on a miss.
+
+    Parameters:
+    - mask_path (str): The file path to the mask GeoDataFrame.
+    - target_crs (str): The target CRS for the mask. Defaults to "EPSG:3006".
+    - tile_size (float): The tile size of the MaskIndex. If None, it is chosen from the mask complexity.
+    - cache_dir (str): The directory of the cache. Defaults to "./data/cache/mask".
+    - max_bytes (int): The maximum total size of the cache. The least recently used entries are evicted
+                       when a new entry makes the cache larger. Defaults to 1 GiB.
+
+    Returns:
+    - Tuple[gpd.GeoDataFrame, MaskIndex]: The mask, with its geometry column only, and its index.
+
+    Note:
+    - Entries are keyed on a SHA-256 hash of the mask file content, the target CRS and the index parameters,
+      so an edited mask file or a different CRS or tile size never hits a stale entry. When an entry is
+      written, older entries for the same mask name and parameters are deleted.
+    - An entry is a single uncompressed '.npz' file holding the mask and index geometries as WKB and the
+      index grid as numeric arrays. The STRtree is rebuilt from the tiles on load.
+    - Entries are written to a temporary file first and then renamed, so concurrent runs never read a
+      partially written entry.
+
+    Example:
+    >>> mask, index = load_mask_index('./data/input/mask/coastline.gpkg')
+    """
+    stem = os.path.splitext(os.path.basename(mask_path))[0]
+    params = json.dumps(
+        {"version": CACHE_VERSION, "crs": str(target_crs), "tile_size": tile_size},
+        sort_keys=True,
+    )
+    params_hash = hashlib.sha256(params.encode()).hexdigest()[:12]
+    prefix = os.path.join(cache_dir, f"{stem}-{params_hash}-")
+    entry_path = prefix + _file_hash(mask_path)[:16] + ".npz"
+
+    if os.path.exists(entry_path):
+        try:
+            mask, index = _read_entry(entry_path)
+            os.utime(entry_path)
+            print(f"Loaded mask from cache '{entry_path}'.")
+            return mask, index
+        except (OSError, ValueError, KeyError):
+            print(f"Ignoring unreadable mask cache entry '{entry_path}'.")
+
+    mask = read_mask(mask_path, target_crs=target_crs)
+    index = MaskIndex(mask, tile_size=tile_size)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    for stale_path in glob.glob(glob.escape(prefix) + "*.npz"):
+        if stale_path != entry_path:
+            _remove(stale_path)
+    _write_entry(entry_path, mask, index)
+    evict_mask_cache(cache_dir, max_bytes, keep=entry_path)
+    print(f"Saved mask to cache '{entry_path}'.")
+
+    return mask[[mask.geometry.name]], index
+
+
+def evict_mask_cache(cache_dir: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES, keep: str = None) -> None:
+    """
+    Deletes the least recently used cache entries until the cache is at most 'max_bytes' large.
+
+    Parameters:
+    - cache_dir (str): The directory of the cache.
+    - max_bytes (int): The maximum total size of the cache.
+    - keep (str): An optional entry that is never deleted, e.g. the one just written.
+    """
+    entries = []
+    for path in glob.glob(os.path.join(glob.escape(cache_dir), "*.npz")):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        _remove(path)
+        total -= size
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_entry(path: str, mask: gpd.GeoDataFrame, index: MaskIndex) -> None:
+    arrays = {
+        "mask": shapely.to_wkb(mask.geometry.values),
+        **index.to_arrays(),
+    }
+    packed = {"crs": np.array(mask.crs.to_string())}
+    for name, values in arrays.items():
+        if values.dtype == object:
+            packed[name + "_data"], packed[name + "_offsets"] = _pack_bytes(values)
+        else:
+            packed[name] = values
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".npz.tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as file:
+            np.savez(file, **packed)
+        os.replace(tmp_path, path)
+    except BaseException:
+        _remove(tmp_path)
+        raise
+
+
+def _read_entry(path: str) -> (gpd.GeoDataFrame, MaskIndex):
+    with np.load(path, allow_pickle=False) as packed:
+        arrays = {}
+        for name in packed.files:
+            if name.endswith("_offsets"):
+                continue
+            if name.endswith("_data"):
+                base = name[: -len("_data")]
+                arrays[base] = _unpack_bytes(packed[name], packed[base + "_offsets"])
+            else:
+                arrays[name] = packed[name]
+
+    crs = str(arrays.pop("crs"))
+    mask = gpd.GeoDataFrame(geometry=shapely.from_wkb(arrays.pop("mask")), crs=crs)
+    index = MaskIndex.from_arrays(arrays, mask.crs)
+    return mask, index
+
+
+def _pack_bytes(values: np.ndarray) -> (np.ndarray, np.ndarray):
+    """
+    Packs an array of bytes objects into one uint8 buffer and the offsets of its items.
+    """
+    lengths = np.fromiter((len(value) for value in values), dtype=np.int64, count=len(values))
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    data = np.frombuffer(b"".join(values), dtype=np.uint8)
+    return data, offsets
+
+
+def _unpack_bytes(data: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    buffer = data.tobytes()
+    return np.array(
+        [buffer[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])],
+        dtype=object,
+    )
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,320 @@
+import geopandas as gpd
+import numpy as np
+import shapely
+
+MAX_GRID_CELLS = 10_000_000
+
+
+class MaskIndex:
+    """
+    A prepared, spatially indexed mask for bulk point-in-mask queries.
+
+    The mask polygons are exploded into single polygons and clipped to a regular grid of square tiles.
+    Every tile is a small polygon with few vertices, so each point is only tested against the tiles
+    of the grid cell it falls in, instead of against the full mask. The index is built once and can
+    be reused for any number of point clouds in the CRS of the mask.
+
+    Parameters:
+    - mask (gpd.GeoDataFrame): The GeoDataFrame representing the mask, e.g. as returned by 'read_mask'.
+    - tile_size (float): The side length of the grid cells, in units of the mask CRS. If None, it is chosen
+                         so that the tiles hold about 'vertices_per_tile' vertices on average.
+    - vertices_per_tile (int): The average number of vertices per tile aimed for if 'tile_size' is None.
+                               Defaults to 16.
+
+    Attributes:
+    - crs: The CRS of the mask. Coordinates passed to 'contains' must be in this CRS.
+    - polygons (np.ndarray): The exploded, prepared mask polygons.
+    - tiles (np.ndarray): The prepared polygon pieces of the mask clipped to the grid cells.
+    - tree (shapely.STRtree): An STRtree over 'tiles'.
+
+    Note:
+    - A point strictly inside a grid cell is within the mask if, and only if, it is within one of the
+      tiles of that cell. Cells completely covered by the mask are answered without any geometry test,
+      and points outside the grid are rejected without any geometry test.
+    - Points lying exactly on a grid line are tested against the original polygons, since they lie on
+      the boundary of the tiles on both sides of the line.
+    - Clipping creates new vertices on the grid lines whose coordinates are rounded to float64, so points
+      within a few ulp of a mask edge may be classified differently than by 'gpd.sjoin'.
+
+    Example:
+    >>> mask = read_mask('./data/input/mask/coastline.gpkg')
+    >>> index = MaskIndex(mask)
+    >>> inside = index.contains(x, y)
+    """
+
+    def __init__(
+        self,
+        mask: gpd.GeoDataFrame,
+        tile_size: float = None,
+        vertices_per_tile: int = 16,
+    ):
+        self.crs = mask.crs
+
+        polygons = shapely.get_parts(mask.geometry.values)
+        polygons = polygons[
+            (shapely.get_type_id(polygons) == 3) & ~shapely.is_empty(polygons)
+        ]
+        if len(polygons) == 0:
+            raise ValueError("Mask does not contain any polygons.")
+
+        shapely.prepare(polygons)
+        self.polygons = polygons
+
+        xmin, ymin, xmax, ymax = shapely.total_bounds(polygons)
+        if tile_size is None:
+            tile_size = _auto_tile_size(polygons, vertices_per_tile)
+        self.tile_size = float(tile_size)
+
+        self._nx = max(1, int(np.ceil((xmax - xmin) / self.tile_size)))
+        self._ny = max(1, int(np.ceil((ymax - ymin) / self.tile_size)))
+        if self._nx * self._ny > MAX_GRID_CELLS:
+            raise ValueError(
+                f"Tile size {self.tile_size} gives {self._nx * self._ny} grid cells, more than {MAX_GRID_CELLS}. Use a larger tile size."
+            )
+        self._x_edges = xmin + np.arange(self._nx + 1) * self.tile_size
+        self._y_edges = ymin + np.arange(self._ny + 1) * self.tile_size
+
+        tiles, cells = self._clip_to_grid(polygons)
+        shapely.prepare(tiles)
+        self.tiles = tiles
+        self.tree = shapely.STRtree(tiles)
+
+        # Cells completely covered by the mask
+        covered = np.zeros(self._nx * self._ny, dtype=bool)
+        covered[cells[self._is_cell(tiles, cells)]] = True
+        self._covered = covered
+
+        # Tiles of each cell in CSR layout: cell c holds tiles[_tile_order[_cell_start[c]:_cell_start[c + 1]]]
+        self._tile_order = np.argsort(cells, kind="stable")
+        self._cell_start = np.searchsorted(
+            cells[self._tile_order], np.arange(self._nx * self._ny + 1)
+        )
+
+    def __len__(self) -> int:
+        return len(self.tiles)
+
+    def __setstate__(self, state: dict):
+        # Prepared geometries are not kept when pickling, e.g. when sent to worker processes
+        self.__dict__.update(state)
+        shapely.prepare(self.polygons)
+        shapely.prepare(self.tiles)
+
+    def to_arrays(self) -> dict:
+        """
+        Exports the index as plain arrays, e.g. to store it on disk.
+
+        Returns:
+        - dict: The polygons and tiles as arrays of WKB bytes, and the grid as numeric arrays.
+        """
+        return {
+            "polygons": shapely.to_wkb(self.polygons),
+            "tiles": shapely.to_wkb(self.tiles),
+            "tile_size": np.array(self.tile_size),
+            "x_edges": self._x_edges,
+            "y_edges": self._y_edges,
+            "covered": self._covered,
+            "tile_order": self._tile_order,
+            "cell_start": self._cell_start,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, crs) -> "MaskIndex":
+        """
+        Restores an index exported with 'to_arrays' without clipping the mask again.
+
+        Parameters:
+        - arrays (dict): The arrays returned by 'to_arrays'.
+        - crs: The CRS of the mask.
+
+        Returns:
+        - MaskIndex: The restored index.
+        """
+        index = cls.__new__(cls)
+        index.crs = crs
+        index.polygons = shapely.from_wkb(arrays["polygons"])
+        index.tiles = shapely.from_wkb(arrays["tiles"])
+        shapely.prepare(index.polygons)
+        shapely.prepare(index.tiles)
+        index.tree = shapely.STRtree(index.tiles)
+
+        index._x_edges = np.asarray(arrays["x_edges"])
+        index._y_edges = np.asarray(arrays["y_edges"])
+        index._nx = len(index._x_edges) - 1
+        index._ny = len(index._y_edges) - 1
+        index.tile_size = float(arrays["tile_size"])
+        index._covered = np.asarray(arrays["covered"])
+        index._tile_order = np.asarray(arrays["tile_order"])
+        index._cell_start = np.asarray(arrays["cell_start"])
+        return index
+
+    def contains(
+        self, x: np.ndarray, y: np.ndarray, batch_size: int = 1_000_000
+    ) -> np.ndarray:
+        """
+        Tests which coordinates lie within the mask.
+
+        Parameters:
+        - x (np.ndarray): The 'x' coordinates, in the CRS of the mask.
+        - y (np.ndarray): The 'y' coordinates, in the CRS of the mask.
+        - batch_size (int): The number of points handled at a time, which bounds the size of temporary arrays.
+
+        Returns:
+        - np.ndarray: A boolean array, True for every point within the mask (boundary excluded,
+          as with the 'within' predicate).
+        """
+        x = np.asarray(x, dtype="float64")
+        y = np.asarray(y, dtype="float64")
+        inside = np.zeros(len(x), dtype=bool)
+        for start in range(0, len(x), batch_size):
+            stop = start + batch_size
+            inside[start:stop] = self._contains(x[start:stop], y[start:stop])
+        return inside
+
+    def _contains(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        inside = np.zeros(len(x), dtype=bool)
+
+        ix, on_x_edge = _locate(x, self._x_edges)
+        iy, on_y_edge = _locate(y, self._y_edges)
+        in_grid = (ix >= 0) & (iy >= 0)
+        on_edge = in_grid & (on_x_edge | on_y_edge)
+        in_cell = in_grid & ~on_edge
+
+        # Points on grid lines: test against the original polygons
+        if on_edge.any():
+            inside[on_edge] = self._contains_exact(x[on_edge], y[on_edge])
+
+        points = np.flatnonzero(in_cell)
+        cells = iy[points] * self._nx + ix[points]
+
+        # Points in covered cells: inside without any geometry test
+        covered = self._covered[cells]
+        inside[points[covered]] = True
+        points, cells = points[~covered], cells[~covered]
+
+        # Remaining points: test against the tiles of their cell
+        start = self._cell_start[cells]
+        count = self._cell_start[cells + 1] - start
+        pairs = np.repeat(np.arange(len(points)), count)
+        offset = np.arange(len(pairs)) - np.repeat(np.cumsum(count) - count, count)
+        tiles = self._tile_order[np.repeat(start, count) + offset]
+
+        hit = shapely.contains_xy(
+            self.tiles[tiles], x[points[pairs]], y[points[pairs]]
+        )
+        inside[points[pairs[hit]]] = True
+
+        return inside
+
+    def _contains_exact(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        inside = np.zeros(len(x), dtype=bool)
+        for polygon in self.polygons:
+            inside |= shapely.contains_xy(polygon, x, y)
+        return inside
+
+    def _clip_to_grid(self, polygons: np.ndarray) -> (np.ndarray, np.ndarray):
+        """
+        Clips polygons to the grid cells they overlap, one column strip at a time.
+        """
+        tiles = []
+        cells = []
+        for polygon in polygons:
+            pxmin, pymin, pxmax, pymax = shapely.bounds(polygon)
+            i0, i1 = _cell_range(pxmin, pxmax, self._x_edges)
+            j0, j1 = _cell_range(pymin, pymax, self._y_edges)
+
+            for i in range(i0, i1 + 1):
+                strip = shapely.clip_by_rect(
+                    polygon, self._x_edges[i], pymin, self._x_edges[i + 1], pymax
+                )
+                if shapely.is_empty(strip):
+                    continue
+
+                for j in range(j0, j1 + 1):
+                    tile = shapely.clip_by_rect(
+                        strip,
+                        self._x_edges[i],
+                        self._y_edges[j],
+                        self._x_edges[i + 1],
+                        self._y_edges[j + 1],
+                    )
+                    for part in shapely.get_parts(tile):
+                        if shapely.get_type_id(part) == 3 and not shapely.is_empty(
+                            part
+                        ):
+                            tiles.append(part)
+                            cells.append(j * self._nx + i)
+
+        return np.array(tiles, dtype=object), np.array(cells, dtype=np.int64)
+
+    def _is_cell(self, tiles: np.ndarray, cells: np.ndarray) -> np.ndarray:
+        """
+        Tests which tiles are the complete square of their grid cell.
+        """
+        i = cells % self._nx
+        j = cells // self._nx
+        cell_bounds = np.column_stack(
+            [
+                self._x_edges[i],
+                self._y_edges[j],
+                self._x_edges[i + 1],
+                self._y_edges[j + 1],
+            ]
+        )
+        return (
+            (shapely.get_num_coordinates(tiles) == 5)
+            & (shapely.get_num_interior_rings(tiles) == 0)
+            & (shapely.bounds(tiles) == cell_bounds).all(axis=1)
+        )
+
+
+def _auto_tile_size(polygons: np.ndarray, vertices_per_tile: int) -> float:
+    """
+    Chooses a tile size giving about 'vertices_per_tile' vertices per non-empty tile.
+    """
+    xmin, ymin, xmax, ymax = shapely.total_bounds(polygons)
+    width, height = max(xmax - xmin, 1e-9), max(ymax - ymin, 1e-9)
+    num_tiles = max(1.0, shapely.get_num_coordinates(polygons).sum() / vertices_per_tile)
+    num_tiles = min(num_tiles, MAX_GRID_CELLS / 10)
+    return max(np.sqrt(width * height / num_tiles), max(width, height) / 1000)
+
+
+def _cell_range(low: float, high: float, edges: np.ndarray) -> (int, int):
+    """
+    Returns the first and last cell of a grid axis overlapping the interval [low, high].
+    """
+    num_cells = len(edges) - 1
+    first = int(np.searchsorted(edges, low, side="right")) - 1
+    last = int(np.searchsorted(edges, high, side="left")) - 1
+    return min(max(first, 0), num_cells - 1), min(max(last, 0), num_cells - 1)
+
+
+def _locate(values: np.ndarray, edges: np.ndarray) -> (np.ndarray, np.ndarray):
+    """
+    Locates values on a grid axis.
+
+    Returns the cell of each value (-1 outside the grid) and whether the value lies exactly on a grid line.
+    """
+    num_cells = len(edges) - 1
+    size = edges[1] - edges[0]
+    cell = np.floor((values - edges[0]) / size)
+    cell = np.clip(np.nan_to_num(cell, nan=-1), -1, num_cells).astype(np.int64)
+
+    # Correct rounding of the division against the exact edge coordinates
+    inner = (cell >= 0) & (cell < num_cells)
+    below = inner & (values < edges[np.clip(cell, 0, num_cells)])
+    cell[below] -= 1
+    inner = (cell >= 0) & (cell < num_cells)
+    above = inner & (values >= edges[np.clip(cell + 1, 0, num_cells)])
+    cell[above] += 1
+
+    on_edge = np.zeros(len(values), dtype=bool)
+    inner = (cell >= 0) & (cell < num_cells)
+    on_edge[inner] = values[inner] == edges[cell[inner]]
+
+    # The upper edge of the last cell belongs to the grid
+    last = values == edges[-1]
+    cell[last] = num_cells - 1
+    on_edge |= last
+
+    cell[(cell < 0) | (cell >= num_cells)] = -1
+    return cell, on_edge
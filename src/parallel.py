@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import geopandas as gpd
+import numpy as np
+from src.data_process import morton_codes, points_within_mask
+
+# Mask and index of the current worker process, set once by '_init_worker'
+_worker_mask = None
+_worker_index = None
+
+
+class ParallelIndex:
+    """
+    Classifies points against a mask in a pool of worker processes.
+
+    The points are sorted along a Morton (Z-order) curve and split into chunks of nearby points, which
+    are classified in parallel. The results are written back in the original order of the points.
+    'ParallelIndex' can be used anywhere a 'MaskIndex' or 'RasterMask' is accepted.
+
+    Parameters:
+    - mask (gpd.GeoDataFrame): The GeoDataFrame representing the mask.
+    - index (MaskIndex or RasterMask): An optional prepared index of the mask used by the workers. If None,
+                                       the workers test the points against the mask polygons directly.
+    - workers (int): The number of worker processes. Defaults to the number of CPUs.
+    - chunk_size (int): The number of points per task. Fewer points are classified in the calling process.
+
+    Note:
+    - The mask and index are sent to every worker once, when the worker starts, and not with every task.
+    - The pool is started on first use and kept until 'close' is called, so it can be reused for many
+      point clouds. 'ParallelIndex' is also a context manager that closes the pool on exit.
+
+    Example:
+    >>> with ParallelIndex(mask, MaskIndex(mask), workers=8) as index:
+    ...     pc_inside, pc_outside = split_point_cloud_by_mask(mask, point_cloud, index=index)
+    """
+
+    def __init__(
+        self,
+        mask: gpd.GeoDataFrame,
+        index=None,
+        workers: int = None,
+        chunk_size: int = 1_000_000,
+    ):
+        self.crs = mask.crs
+        self.mask = mask
+        self.index = index
+        self.workers = workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Shuts down the worker processes.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def contains(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Tests which coordinates lie within the mask.
+
+        Parameters:
+        - x (np.ndarray): The 'x' coordinates, in the CRS of the mask.
+        - y (np.ndarray): The 'y' coordinates, in the CRS of the mask.
+
+        Returns:
+        - np.ndarray: A boolean array, True for every point within the mask, in the order of the input.
+        """
+        x = np.asarray(x, dtype="float64")
+        y = np.asarray(y, dtype="float64")
+
+        if len(x) <= self.chunk_size or self.workers < 2:
+            return points_within_mask(self.mask, x, y, index=self.index)
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.mask, self.index),
+            )
+
+        order = np.argsort(morton_codes(x, y), kind="stable")
+        chunks = [
+            order[start : start + self.chunk_size]
+            for start in range(0, len(order), self.chunk_size)
+        ]
+        futures = [
+            self._pool.submit(_classify_chunk, x[chunk], y[chunk]) for chunk in chunks
+        ]
+
+        inside = np.zeros(len(x), dtype=bool)
+        for chunk, future in zip(chunks, futures):
+            inside[chunk] = future.result()
+        return inside
+
+
+def _init_worker(mask: gpd.GeoDataFrame, index):
+    global _worker_mask, _worker_index
+    _worker_mask = mask
+    _worker_index = index
+
+
+def _classify_chunk(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    return points_within_mask(_worker_mask, x, y, index=_worker_index)
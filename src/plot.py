@@ -72,6 +72,7 @@ def add_legend(data: dict):
     Parameters:
     - data (dict): A dictionary containing spatial data:
         - 'out' (gpd.GeoDataFrame): GeoDataFrame representing points outside the polygon.
+        - 'split' (MaskSplit): The split point cloud, used instead of 'out' if given.
         - 'Plot' (bool): If True, the mask is plotted; otherwise, it is not.
 
     Returns:
@@ -93,7 +94,12 @@ def add_legend(data: dict):
 
     legend_handles = [pc_inside_legend]
 
-    if not data["out"].empty:
+    if "split" in data:
+        has_outside = data["split"].num_outside > 0
+    else:
+        has_outside = not data["out"].empty
+
+    if has_outside:
         pc_outside_legend = mlines.Line2D(
             [],
             [],
@@ -123,6 +129,8 @@ def plot_data(data: dict):
         - 'mask' (gpd.GeoDataFrame): GeoDataFrame representing the mask polygon.
         - 'in' (gpd.GeoDataFrame): GeoDataFrame representing points inside the polygon.
         - 'out' (gpd.GeoDataFrame): GeoDataFrame representing points outside the polygon.
+        - 'split' (MaskSplit): The result of 'split_point_cloud_by_mask', used instead of 'in' and 'out' if given.
+          The point cloud is then transformed once, and the points inside and outside are selected afterwards.
         - 'Plot' (bool): If True, the mask is plotted; if False, the mask is not plotted.
 
     Returns:
@@ -137,14 +145,19 @@ def plot_data(data: dict):
     target_crs = "EPSG:3857"
 
     mask = transform_crs(data["mask"], target_crs)
-    pc_inside_polygon = transform_crs(data["in"], target_crs)
+    if "split" in data:
+        point_cloud = transform_crs(data["split"].point_cloud, target_crs)
+        membership = data["split"].membership
+        pc_inside_polygon = point_cloud[membership]
+        pc_outside_polygon = point_cloud[~membership]
+    else:
+        pc_inside_polygon = transform_crs(data["in"], target_crs)
+        pc_outside_polygon = transform_crs(data["out"], target_crs)
 
     # Buffer the single-point GeoDataFrame if 'Plot' is not True
     if pc_inside_polygon.shape[0] == 1 and data["Plot"] is not True:
         pc_inside_polygon["geometry"] = pc_inside_polygon.buffer(0.0001)
 
-    pc_outside_polygon = transform_crs(data["out"], target_crs)
-
     ax = plt.figure(figsize=(10, 10)).add_subplot(1, 1, 1)
 
     if data["Plot"]:
@@ -0,0 +1,289 @@
+import os
+import numpy as np
+import pandas as pd
+
+CSV_EXTENSIONS = (".csv",)
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+LAS_EXTENSIONS = (".las", ".laz")
+EXTENSIONS = CSV_EXTENSIONS + PARQUET_EXTENSIONS + ARROW_EXTENSIONS + LAS_EXTENSIONS
+
+# Scale of the LAS integer coordinates when no input header is available (millimetres)
+LAS_SCALE = 0.001
+
+
+def point_cloud_format(file_path: str) -> str:
+    """
+    Returns the point cloud file format from the file extension.
+
+    Parameters:
+    - file_path (str): The file path of the point cloud.
+
+    Returns:
+    - str: One of 'csv', 'parquet', 'arrow' or 'las'.
+
+    Raises:
+    - ValueError: If the extension is not supported.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    for name, extensions in (
+        ("csv", CSV_EXTENSIONS),
+        ("parquet", PARQUET_EXTENSIONS),
+        ("arrow", ARROW_EXTENSIONS),
+        ("las", LAS_EXTENSIONS),
+    ):
+        if extension in extensions:
+            return name
+    raise ValueError(
+        f"Unsupported point cloud file extension '{extension}'. Supported extensions: {', '.join(EXTENSIONS)}"
+    )
+
+
+def read_point_cloud(file_path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Reads a point cloud from a CSV, Parquet, Arrow or LAS/LAZ file, selected by file extension.
+
+    Parameters:
+    - file_path (str): The file path of the point cloud.
+    - columns (list): The columns to read. Defaults to all columns.
+
+    Returns:
+    - pd.DataFrame: The point cloud DataFrame.
+    """
+    chunks = list(iter_point_cloud(file_path, chunk_size=None, columns=columns))
+    if len(chunks) == 1:
+        return chunks[0]
+    point_cloud = pd.concat(chunks, ignore_index=True)
+    point_cloud.attrs = chunks[0].attrs
+    return point_cloud
+
+
+def iter_point_cloud(file_path: str, chunk_size: int, columns: list = None):
+    """
+    Reads a point cloud in chunks of at most 'chunk_size' rows, selected by file extension.
+
+    Parameters:
+    - file_path (str): The file path of the point cloud.
+    - chunk_size (int): The maximum number of rows per chunk. If None, the whole file is read as one chunk.
+    - columns (list): The columns to read. Defaults to all columns.
+
+    Returns:
+    - Iterator[pd.DataFrame]: An iterator over the chunks of the point cloud.
+
+    Note:
+    - Parquet files are read one row group at a time, Arrow IPC files one record batch at a time and
+      LAS/LAZ files with the laspy chunk iterator, so only one chunk is held in memory.
+    - Only the requested columns are decoded from Parquet and Arrow files.
+    - The LAS header of LAS/LAZ input is kept in 'attrs["las_header"]', so that the points can be
+      written back with the same point format, scales and offsets.
+    """
+    file_format = point_cloud_format(file_path)
+
+    if file_format == "csv":
+        if chunk_size is None:
+            yield pd.read_csv(file_path, usecols=columns)
+        else:
+            yield from pd.read_csv(file_path, usecols=columns, chunksize=chunk_size)
+
+    elif file_format == "parquet":
+        pq = _import_optional("pyarrow.parquet", "pyarrow")
+        parquet_file = pq.ParquetFile(file_path)
+        if chunk_size is None:
+            yield parquet_file.read(columns=columns).to_pandas()
+        else:
+            for batch in parquet_file.iter_batches(
+                batch_size=chunk_size, columns=columns
+            ):
+                yield batch.to_pandas()
+
+    elif file_format == "arrow":
+        ipc = _import_optional("pyarrow.ipc", "pyarrow")
+        with ipc.open_file(file_path) as reader:
+            if chunk_size is None:
+                table = reader.read_all()
+                yield (table.select(columns) if columns else table).to_pandas()
+                return
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if columns:
+                    batch = batch.select(columns)
+                for start in range(0, batch.num_rows, chunk_size):
+                    yield batch.slice(start, chunk_size).to_pandas()
+
+    else:
+        laspy = _import_optional("laspy", "laspy")
+        with laspy.open(file_path) as reader:
+            num_points = reader.header.point_count
+            for points in reader.chunk_iterator(chunk_size or max(num_points, 1)):
+                chunk = _las_points_to_frame(points, columns)
+                chunk.attrs["las_header"] = reader.header
+                yield chunk
+
+
+def write_point_cloud(df: pd.DataFrame, file_path: str, rows: np.ndarray = None) -> None:
+    """
+    Writes a point cloud to a CSV, Parquet, Arrow or LAS/LAZ file, selected by file extension.
+
+    Parameters:
+    - df (pd.DataFrame): The point cloud. A 'geometry' column is not written.
+    - file_path (str): The file path to write to.
+    - rows (np.ndarray): An optional boolean array selecting the rows to write, e.g. the points inside a mask.
+    """
+    with PointCloudWriter(file_path) as writer:
+        writer.write(df, rows=rows)
+
+
+class PointCloudWriter:
+    """
+    Writes a point cloud to a file chunk by chunk, in the format selected by the file extension.
+
+    Parameters:
+    - file_path (str): The file path to write to. The file is created on the first call to 'write'.
+
+    Note:
+    - CSV output is identical to 'DataFrame.to_csv(file_path, index=False)' of all chunks concatenated.
+    - Parquet output gets one row group per written chunk, Arrow output one record batch per chunk.
+    - LAS/LAZ output reuses the LAS header of the input if the chunks carry one in 'attrs["las_header"]'.
+      Otherwise a LAS 1.4 header with point format 6 and millimetre scales is created, and columns
+      that are not LAS dimensions are stored as extra bytes.
+    - The writer is a context manager, and the file is complete once 'close' is called.
+
+    Example:
+    >>> with PointCloudWriter('./data/output/test1_filtered.parquet') as writer:
+    ...     for chunk in iter_point_cloud('./data/input/point_cloud/test1.parquet', 1_000_000):
+    ...         writer.write(chunk, rows=inside_mask(chunk))
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.format = point_cloud_format(file_path)
+        self.num_rows = 0
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, df: pd.DataFrame, rows: np.ndarray = None) -> None:
+        """
+        Appends the rows of a point cloud chunk to the file.
+
+        Parameters:
+        - df (pd.DataFrame): The point cloud chunk. A 'geometry' column is not written.
+        - rows (np.ndarray): An optional boolean array selecting the rows to write.
+        """
+        if "geometry" in df.columns:
+            df = pd.DataFrame(df.drop(columns="geometry"))
+        if rows is not None:
+            df = df[rows]
+
+        if self.format == "csv":
+            self._write_csv(df)
+        elif self.format == "parquet":
+            self._write_arrow(df, parquet=True)
+        elif self.format == "arrow":
+            self._write_arrow(df, parquet=False)
+        else:
+            self._write_las(df)
+        self.num_rows += len(df)
+
+    def close(self) -> None:
+        """
+        Finishes the file. A file that no chunk was written to is created with no rows.
+        """
+        if self._writer is None and self.format == "csv":
+            open(self.file_path, "w").close()
+        elif self._writer is None and self.format == "las":
+            self._write_las(pd.DataFrame({"x": [], "y": [], "z": []}))
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _write_csv(self, df: pd.DataFrame) -> None:
+        if self._writer is None:
+            self._writer = open(self.file_path, "w", newline="")
+            df.to_csv(self._writer, index=False)
+        else:
+            df.to_csv(self._writer, header=False, index=False)
+
+    def _write_arrow(self, df: pd.DataFrame, parquet: bool) -> None:
+        pa = _import_optional("pyarrow", "pyarrow")
+        if self._writer is None:
+            self._schema = pa.Schema.from_pandas(df, preserve_index=False).remove_metadata()
+            if parquet:
+                pq = _import_optional("pyarrow.parquet", "pyarrow")
+                self._writer = pq.ParquetWriter(self.file_path, self._schema)
+            else:
+                ipc = _import_optional("pyarrow.ipc", "pyarrow")
+                self._writer = ipc.new_file(self.file_path, self._schema)
+
+        table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def _write_las(self, df: pd.DataFrame) -> None:
+        laspy = _import_optional("laspy", "laspy")
+        if self._writer is None:
+            header = df.attrs.get("las_header")
+            if header is not None:
+                header = laspy.LasHeader(
+                    point_format=header.point_format, version=header.version
+                )
+                source = df.attrs["las_header"]
+                header.scales, header.offsets = source.scales, source.offsets
+            else:
+                header = laspy.LasHeader(point_format=6, version="1.4")
+                header.scales = np.full(3, LAS_SCALE)
+                header.offsets = [
+                    np.floor(df[axis].min()) if axis in df.columns and len(df) else 0.0
+                    for axis in "xyz"
+                ]
+                for name in df.columns:
+                    if name not in ("x", "y", "z") + tuple(
+                        header.point_format.dimension_names
+                    ):
+                        header.add_extra_dim(
+                            laspy.ExtraBytesParams(name=name, type=df[name].dtype)
+                        )
+            self._writer = laspy.open(
+                self.file_path,
+                mode="w",
+                header=header,
+                do_compress=self.file_path.lower().endswith(".laz"),
+            )
+
+        points = laspy.ScaleAwarePointRecord.zeros(
+            len(df), header=self._writer.header
+        )
+        for name in df.columns:
+            if name in ("x", "y", "z") or name in points.point_format.dimension_names:
+                points[name] = df[name].to_numpy()
+        self._writer.write_points(points)
+
+
+def _las_points_to_frame(points, columns: list = None) -> pd.DataFrame:
+    """
+    Converts LAS points to a DataFrame with scaled 'x', 'y', 'z' coordinates and the other dimensions.
+    """
+    names = ["x", "y", "z"] + [
+        name
+        for name in points.point_format.dimension_names
+        if name not in ("X", "Y", "Z")
+    ]
+    if columns is not None:
+        names = [name for name in names if name in columns]
+    return pd.DataFrame({name: np.asarray(points[name]) for name in names})
+
+
+def _import_optional(module: str, package: str):
+    """
+    Imports an optional dependency, with an install hint if it is missing.
+    """
+    try:
+        return __import__(module, fromlist=["_"])
+    except ImportError as error:
+        raise ImportError(
+            f"Reading and writing this point cloud format requires '{package}'. Install it with 'pip install {package}'."
+        ) from error
@@ -0,0 +1,88 @@
+import os
+import geopandas as gpd
+from src.data_process import resolve_crs, transform_xy, classify_points
+from src.point_cloud_io import PointCloudWriter, iter_point_cloud
+
+
+def filter_point_cloud_stream(
+    mask: gpd.GeoDataFrame,
+    input_path: str,
+    filename: str,
+    epsg_code: str,
+    chunk_size: int,
+    index=None,
+    extension: str = None,
+) -> dict:
+    """
+    Splits a point cloud by a mask chunk by chunk and appends the results to the output files.
+
+    Parameters:
+    - mask (gpd.GeoDataFrame): The GeoDataFrame representing the mask used for splitting the point cloud.
+    - input_path (str): The file path to the point cloud, in any format supported by 'iter_point_cloud'.
+    - filename (str): The base name for the output files.
+    - epsg_code (str): The EPSG code of the point cloud. If None, 'EPSG:3006' ('SWEREF 99 TM') is assumed.
+    - chunk_size (int): The number of rows read, classified and written at a time.
+    - index (MaskIndex or RasterMask): An optional prepared index of the mask, used to classify the chunks.
+    - extension (str): The file extension, and so the format, of the output files. Defaults to the extension
+      of the input file.
+
+    Returns:
+    - dict: The number of rows read ('input'), rejected by the bounding box prefilter ('rejected_bbox'),
+      tested exactly ('tested'), inside the mask ('inside') and outside the mask ('outside').
+
+    Raises:
+    - NameError: If the 'x' and 'y' columns are not found in the point cloud.
+
+    Note:
+    - Only one chunk is held in memory at a time, so peak memory is bounded by 'chunk_size' and not by the
+      size of the input file.
+    - Points inside the mask are written to "./data/output/<filename>_filtered<extension>" and points outside
+      the mask to "./data/output/<filename>_outside<extension>". The inside file is identical to the one
+      written by 'save_pc_inside_mask' for the same input.
+    - Each chunk is written by selecting rows with the boolean classification, without building a GeoDataFrame.
+    - No Point geometries are built; each chunk is classified from its raw 'x' and 'y' coordinates.
+
+    Example:
+    >>> mask = read_mask('./data/input/mask/coastline.gpkg')
+    >>> filter_point_cloud_stream(mask, './data/input/point_cloud/test1.csv', 'test1', None, 1_000_000)
+    """
+    source_crs = resolve_crs(epsg_code)
+    if extension is None:
+        extension = os.path.splitext(input_path)[1]
+    inside_path = "./data/output/" + filename + "_filtered" + extension
+    outside_path = "./data/output/" + filename + "_outside" + extension
+    counts = {}
+
+    with PointCloudWriter(inside_path) as inside_writer, PointCloudWriter(
+        outside_path
+    ) as outside_writer:
+        for chunk in iter_point_cloud(input_path, chunk_size):
+            if not "x" in chunk.columns and not "y" in chunk.columns:
+                raise NameError("Coordinates have to be labeled 'x' and 'y'")
+
+            x = chunk["x"].to_numpy(dtype="float64")
+            y = chunk["y"].to_numpy(dtype="float64")
+            x, y = transform_xy(x, y, source_crs, mask.crs)
+            inside = classify_points(mask, x, y, index=index, stats=counts)
+
+            inside_writer.write(chunk, rows=inside)
+            outside_writer.write(chunk, rows=~inside)
+
+    counts["outside"] = counts.get("input", 0) - counts.get("inside", 0)
+
+    print("=" * 30)
+    print("Summary")
+    print("-" * 30)
+    print("Number of points:")
+    print(f"Input point cloud: {counts.get('input', 0)}")
+    print(f"Point cloud inside mask: {counts.get('inside', 0)}")
+    print(f"Point cloud outside mask: {counts['outside']}")
+    print("-" * 30)
+    print("Number of points per stage:")
+    print(f"Rejected by bounding box: {counts.get('rejected_bbox', 0)}")
+    print(f"Tested exactly: {counts.get('tested', 0)}")
+    print("=" * 30)
+    print(f"Saved filtered point cloud to '{inside_path}'.")
+    print(f"Saved point cloud outside mask to '{outside_path}'.")
+
+    return counts